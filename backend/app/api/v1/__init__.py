@@ -4,3 +4,10 @@ router = APIRouter()
 
 from . import projects  # noqa: F401
 from . import auth  # noqa: F401
+from . import telemetry  # noqa: F401
+from . import jobs  # noqa: F401
+
+router.include_router(projects.router)
+router.include_router(auth.router)
+router.include_router(telemetry.router)
+router.include_router(jobs.router)
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from ...core.config import settings
+from ...core.jobs import JobQueue, get_job_queue
+
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    max_attempts: int = Field(default=1, ge=1, le=10)
+
+
+class JobSummaryOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: float
+    message: Optional[str]
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class JobOut(JobSummaryOut):
+    payload: Optional[Dict[str, Any]]
+    result: Optional[Any]
+
+
+@router.post("/", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(payload: JobCreate, queue: JobQueue = Depends(get_job_queue)):
+    if not queue.started:
+        raise HTTPException(status_code=503, detail="Background job queue is not running")
+    try:
+        job = await queue.submit(payload.kind, payload.payload, max_attempts=payload.max_attempts)
+    except KeyError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind {payload.kind!r}; expected one of {queue.kinds()}",
+        )
+    return job
+
+
+@router.get("/", response_model=List[JobSummaryOut])
+async def list_jobs(limit: int = Query(50, ge=1, le=500), queue: JobQueue = Depends(get_job_queue)):
+    return await queue.list(limit=limit)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = await queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobOut)
+async def cancel_job(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = await queue.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/artifact")
+async def get_job_artifact(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = await queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    artifact = job.result.get("artifact") if isinstance(job.result, dict) else None
+    if not isinstance(artifact, str):
+        raise HTTPException(status_code=404, detail="Job has no artifact")
+    # only ever serve files inside the artifact directory
+    root = os.path.realpath(settings.job_artifact_dir)
+    path = os.path.realpath(os.path.join(root, artifact))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return FileResponse(path, filename=os.path.basename(path))
@@ -0,0 +1,274 @@
+"""
+Binary telemetry ingestion for IoT devices.
+
+Devices push readings as a stream of compact frames instead of JSON
+``MetricPoint`` lists. Each frame is little-endian and laid out as::
+
+    magic     4 bytes   b"NXTF"
+    count     uint32    number of points in the frame
+    times     int64[count]    unix epoch milliseconds
+    values    float64[count]
+
+A request body is any number of frames back to back, optionally gzip'd
+(``Content-Encoding: gzip``, one or more concatenated members). The body is
+consumed chunk by chunk from the request stream and inflated in bounded
+steps, so memory holds at most one step of decoded data plus the current
+partial frame. Arrays are viewed in place with ``numpy.frombuffer`` and
+validated per frame rather than per point. A request carrying more than
+``TELEMETRY_MAX_REQUEST_POINTS`` points is rejected with 413.
+
+Validated frames are handed to a :class:`TelemetrySink` after each step;
+the default sink writes them to the ``telemetry_points`` table and
+commits only once the whole body has been accepted. An optional
+``X-Device-Id`` header is stored with every point.
+"""
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from pydantic import BaseModel
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core import metrics
+from ...core.config import settings
+from ...core.database import get_db
+from ...models import TelemetryPoint
+
+
+router = APIRouter(prefix="/api/v1/telemetry", tags=["telemetry"])
+
+FRAME_MAGIC = b"NXTF"
+FRAME_HEADER = struct.Struct("<4sI")
+POINT_SIZE = 16  # one int64 timestamp + one float64 value
+INFLATE_CHUNK = 256 * 1024  # cap on decompressed bytes produced per step
+
+TIME_DTYPE = np.dtype("<i8")
+VALUE_DTYPE = np.dtype("<f8")
+
+
+class FrameError(ValueError):
+    """Raised when a telemetry body is malformed or fails validation."""
+
+
+class RequestTooLarge(FrameError):
+    """Raised when a request carries more points than allowed."""
+
+
+class IngestSummary(BaseModel):
+    frames: int
+    points: int
+    min_time: Optional[int] = None
+    max_time: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    mean_value: Optional[float] = None
+
+
+def encode_frame(times, values) -> bytes:
+    """Pack timestamps (ms) and values into a single frame."""
+    times = np.ascontiguousarray(times, dtype=TIME_DTYPE)
+    values = np.ascontiguousarray(values, dtype=VALUE_DTYPE)
+    if times.shape != values.shape or times.ndim != 1:
+        raise ValueError("times and values must be 1-D arrays of equal length")
+    return FRAME_HEADER.pack(FRAME_MAGIC, len(times)) + times.tobytes() + values.tobytes()
+
+
+@dataclass
+class FrameAccumulator:
+    """Incrementally parses frames and folds them into running aggregates."""
+
+    max_points: int = settings.telemetry_max_frame_points
+    max_request_points: int = field(default_factory=lambda: settings.telemetry_max_request_points)
+    frames: int = 0
+    points: int = 0
+    min_time: Optional[int] = None
+    max_time: Optional[int] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    value_sum: float = 0.0
+    pending: List[Tuple[np.ndarray, np.ndarray]] = field(default_factory=list)
+
+    def consume(self, buf: bytearray) -> int:
+        """Parse every complete frame at the start of ``buf``.
+
+        Returns the number of bytes consumed; the caller drops that prefix
+        once this returns, which is safe because no array views outlive the
+        call. Validated frames are copied out to ``pending`` for the sink.
+        """
+        offset = 0
+        end = len(buf)
+        while end - offset >= FRAME_HEADER.size:
+            magic, count = FRAME_HEADER.unpack_from(buf, offset)
+            if magic != FRAME_MAGIC:
+                raise FrameError(f"bad frame magic at byte {offset}")
+            if count == 0 or count > self.max_points:
+                raise FrameError(f"frame point count {count} out of range (1..{self.max_points})")
+            if self.points + count > self.max_request_points:
+                raise RequestTooLarge(f"request exceeds {self.max_request_points} points")
+            frame_size = FRAME_HEADER.size + count * POINT_SIZE
+            if end - offset < frame_size:
+                break
+            data_offset = offset + FRAME_HEADER.size
+            times = np.frombuffer(buf, dtype=TIME_DTYPE, count=count, offset=data_offset)
+            values = np.frombuffer(buf, dtype=VALUE_DTYPE, count=count, offset=data_offset + count * 8)
+            self._fold(times, values)
+            self.pending.append((times.copy(), values.copy()))
+            offset += frame_size
+        return offset
+
+    def _fold(self, times: np.ndarray, values: np.ndarray) -> None:
+        if not np.isfinite(values).all():
+            raise FrameError(f"frame {self.frames} contains non-finite values")
+        if (times < 0).any():
+            raise FrameError(f"frame {self.frames} contains negative timestamps")
+        if (np.diff(times) < 0).any():
+            raise FrameError(f"frame {self.frames} timestamps are not ordered")
+
+        t_min, t_max = int(times[0]), int(times[-1])
+        v_min, v_max = float(values.min()), float(values.max())
+        self.min_time = t_min if self.min_time is None else min(self.min_time, t_min)
+        self.max_time = t_max if self.max_time is None else max(self.max_time, t_max)
+        self.min_value = v_min if self.min_value is None else min(self.min_value, v_min)
+        self.max_value = v_max if self.max_value is None else max(self.max_value, v_max)
+        self.value_sum += float(values.sum())
+        self.frames += 1
+        self.points += len(values)
+
+    def drain(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        frames, self.pending = self.pending, []
+        return frames
+
+    def summary(self) -> IngestSummary:
+        return IngestSummary(
+            frames=self.frames,
+            points=self.points,
+            min_time=self.min_time,
+            max_time=self.max_time,
+            min_value=self.min_value,
+            max_value=self.max_value,
+            mean_value=self.value_sum / self.points if self.points else None,
+        )
+
+
+class TelemetrySink:
+    """Destination for validated frames; one instance per request."""
+
+    async def write(self, device_id: Optional[str], times: np.ndarray, values: np.ndarray) -> None:
+        raise NotImplementedError
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+class DatabaseSink(TelemetrySink):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def write(self, device_id, times, values):
+        rows = [
+            {"device_id": device_id, "time": t, "value": v}
+            for t, v in zip(times.tolist(), values.tolist())
+        ]
+        await self.db.execute(insert(TelemetryPoint), rows)
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
+
+
+async def get_telemetry_sink(db: AsyncSession = Depends(get_db)) -> TelemetrySink:
+    return DatabaseSink(db)
+
+
+class GzipDecoder:
+    """Streaming gzip decoder that follows concatenated members (RFC 1952)."""
+
+    def __init__(self):
+        self._decoder = self._member()
+
+    @staticmethod
+    def _member():
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def feed(self, chunk: bytes):
+        while True:
+            # bounded steps keep a small gzip body from expanding all at once
+            data = self._decoder.decompress(chunk, INFLATE_CHUNK)
+            while data:
+                yield data
+                data = self._decoder.decompress(self._decoder.unconsumed_tail, INFLATE_CHUNK)
+            if not (self._decoder.eof and self._decoder.unused_data):
+                return
+            # another member follows; anything that is not gzip raises zlib.error
+            chunk = self._decoder.unused_data
+            self._decoder = self._member()
+
+    def close(self) -> None:
+        if not self._decoder.eof:
+            raise FrameError("truncated gzip stream")
+
+
+def _decoder(content_encoding: str) -> Optional[GzipDecoder]:
+    encoding = content_encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding == "gzip":
+        return GzipDecoder()
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported content encoding: {content_encoding}",
+    )
+
+
+@router.post("/ingest", response_model=IngestSummary)
+async def ingest(
+    request: Request,
+    x_device_id: Optional[str] = Header(None, max_length=255),
+    sink: TelemetrySink = Depends(get_telemetry_sink),
+):
+    decoder = _decoder(request.headers.get("content-encoding", ""))
+    acc = FrameAccumulator()
+    buf = bytearray()
+
+    try:
+        async for chunk in request.stream():
+            pieces = (chunk,) if decoder is None else decoder.feed(chunk)
+            for piece in pieces:
+                buf += piece
+                del buf[: acc.consume(buf)]
+                for times, values in acc.drain():
+                    await sink.write(x_device_id, times, values)
+        if decoder is not None:
+            decoder.close()
+        if buf:
+            raise FrameError(f"{len(buf)} trailing bytes do not form a complete frame")
+    except zlib.error as exc:
+        await sink.rollback()
+        metrics.telemetry_rejected.labels(reason="gzip").inc()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid gzip body: {exc}")
+    except RequestTooLarge as exc:
+        await sink.rollback()
+        metrics.telemetry_rejected.labels(reason="too_large").inc()
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    except FrameError as exc:
+        await sink.rollback()
+        metrics.telemetry_rejected.labels(reason="frame").inc()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    except Exception:
+        await sink.rollback()
+        raise
+
+    await sink.commit()
+    metrics.telemetry_frames.inc(acc.frames)
+    metrics.telemetry_points.inc(acc.points)
+    metrics.telemetry_request_points.observe(acc.points)
+    return acc.summary()
@@ -7,6 +7,15 @@ class Settings:
     app_name: str = os.getenv("APP_NAME", "Nexus Edge Systems API")
     database_url: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./dev.db")
     sentry_dsn: str = os.getenv("SENTRY_DSN", "")
+    job_workers: int = int(os.getenv("JOB_WORKERS", "2"))
+    job_process_workers: int = int(os.getenv("JOB_PROCESS_WORKERS", "0"))
+    job_artifact_dir: str = os.getenv("JOB_ARTIFACT_DIR", "./job_artifacts")
+    job_poll_interval: float = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+    job_lease_timeout: float = float(os.getenv("JOB_LEASE_TIMEOUT", "30"))
+    job_recover_on_start: bool = os.getenv("JOB_RECOVER_ON_START", "0") == "1"
+    job_retry_delay: float = float(os.getenv("JOB_RETRY_DELAY", "5"))
+    telemetry_max_frame_points: int = int(os.getenv("TELEMETRY_MAX_FRAME_POINTS", "65536"))
+    telemetry_max_request_points: int = int(os.getenv("TELEMETRY_MAX_REQUEST_POINTS", "1000000"))
 
 
 settings = Settings()
@@ -0,0 +1,415 @@
+"""
+In-process background job queue.
+
+Jobs are rows in the ``jobs`` table, so their state survives restarts and can
+be polled from any request. A fixed pool of asyncio workers pulls job ids off
+an in-memory queue and runs the handler registered for the job's ``kind``.
+Handlers are coroutines that receive a :class:`JobContext`, which lets them
+report progress and push blocking or CPU-bound steps onto a thread or process
+pool instead of the event loop.
+
+All coordination goes through the table, so several processes can share it.
+A worker claims a job by setting ``locked_by`` and refreshes ``heartbeat_at``
+while it runs. Leases that stop being refreshed are reclaimed by any live
+queue. Each queue also polls for pending and due-for-retry rows. Cancelling
+a running job sets ``cancel_requested``, which the owning worker picks up.
+Every state change is a conditional UPDATE, so a late write from a worker
+that lost its lease or was cancelled changes nothing.
+
+Register a handler with::
+
+    @job_handler("export_projects")
+    async def export_projects(ctx, payload):
+        ...
+
+CPU-bound steps need ``JOB_PROCESS_WORKERS`` set to the number of pool
+processes (default 0, no pool); threads are always available.
+
+``@job_handler`` fills the default registry used by ``job_queue``; a
+``JobQueue`` can also be given its own ``handlers`` mapping. The ``jobs``
+table must already exist (``create_tables.py`` or a migration).
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import or_, select, update
+
+from ..models import Job
+from . import metrics
+from .config import settings
+from .database import AsyncSessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+JobHandler = Callable[["JobContext", Dict[str, Any]], Awaitable[Any]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Register the decorated coroutine as the handler for ``kind`` jobs."""
+    def decorator(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+class JobContext:
+    """Handle passed to a running job handler."""
+
+    def __init__(self, queue: "JobQueue", job_id: int, attempt: int):
+        self._queue = queue
+        self.job_id = job_id
+        self.attempt = attempt
+
+    async def report(self, progress: float, message: Optional[str] = None) -> None:
+        """Persist progress as a fraction between 0 and 1."""
+        values = {"progress": min(max(float(progress), 0.0), 1.0)}
+        if message is not None:
+            values["message"] = message[:255]
+        await self._queue._update(self.job_id, **values)
+
+    def session(self):
+        """Open a session on the same database as the queue."""
+        return self._queue._session_factory()
+
+    async def run_in_thread(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._queue.thread_pool, partial(fn, *args, **kwargs))
+
+    async def run_in_process(self, fn: Callable, *args, **kwargs):
+        """Run a picklable, module-level ``fn`` in the shared process pool.
+
+        The pool has ``JOB_PROCESS_WORKERS`` processes; with the default of
+        0 there is no pool and this raises ``RuntimeError``.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._queue.process_pool, partial(fn, *args, **kwargs))
+
+
+class JobQueue:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        concurrency: int = settings.job_workers,
+        process_workers: int = settings.job_process_workers,
+        retry_delay: float = settings.job_retry_delay,
+        handlers: Optional[Dict[str, JobHandler]] = None,
+        poll_interval: float = settings.job_poll_interval,
+        lease_timeout: float = settings.job_lease_timeout,
+    ):
+        self._session_factory = session_factory
+        self.handlers = _handlers if handlers is None else handlers
+        self.concurrency = max(1, concurrency)
+        self.process_workers = max(0, process_workers)
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.worker_id: Optional[str] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._workers: List[asyncio.Task] = []
+        self._maintainer: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._cancel_requested: Set[int] = set()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(thread_name_prefix="job")
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if not self.process_workers:
+            raise RuntimeError("No process pool configured; set JOB_PROCESS_WORKERS to a positive number")
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+        return self._process_pool
+
+    def kinds(self) -> List[str]:
+        return sorted(self.handlers)
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def recover(self) -> None:
+        """Reclaim jobs whose lease has already expired.
+
+        Live leases are left alone, so this is safe with other workers or
+        replicas running. The same pass runs on every maintenance tick;
+        calling it up front only saves one poll interval.
+        """
+        await self._reclaim_expired()
+
+    async def start(self, recover: bool = settings.job_recover_on_start) -> None:
+        if self.started:
+            return
+        # decided here rather than in __init__: a preloaded app is forked
+        # after the module-level queue is built
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue = asyncio.Queue()
+        self._queued.clear()
+        self._stopping = asyncio.Event()
+        if recover:
+            await self.recover()
+        await self._poll_pending()
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._maintainer = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        if self._maintainer is not None:
+            # let an in-flight maintenance pass finish rather than cancel it mid-query
+            self._stopping.set()
+            await asyncio.gather(self._maintainer, return_exceptions=True)
+            self._maintainer = None
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    async def submit(self, kind: str, payload: Optional[Dict[str, Any]] = None, max_attempts: int = 1) -> Job:
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        job = Job(kind=kind, status=PENDING, payload=payload or {}, max_attempts=max(1, max_attempts))
+        async with self._session_factory() as session:
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+        if self.started:
+            self._enqueue(job.id)
+        return job
+
+    async def get(self, job_id: int) -> Optional[Job]:
+        async with self._session_factory() as session:
+            return await session.get(Job, job_id)
+
+    async def list(self, limit: int = 50) -> List[Job]:
+        async with self._session_factory() as session:
+            stmt = select(Job).order_by(Job.id.desc()).limit(limit)
+            return list((await session.execute(stmt)).scalars().all())
+
+    async def cancel(self, job_id: int) -> Optional[Job]:
+        """Cancel a job.
+
+        A pending job is cancelled at once. A running job is flagged with
+        ``cancel_requested``. If it runs in this process it is interrupted
+        now; otherwise its owning worker stops it on its next maintenance
+        tick, so callers should poll for the final status.
+        """
+        job = await self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if not await self._finish(job_id, job.kind, CANCELLED, expect=PENDING):
+            await self._transition(job_id, RUNNING, cancel_requested=True)
+            task = self._running.get(job_id)
+            if task is not None:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                # the handler may have finished before the cancellation landed
+                if task.cancelled():
+                    await self._finish(job_id, job.kind, CANCELLED, owned=True)
+        return await self.get(job_id)
+
+    async def _update(self, job_id: int, **values) -> None:
+        async with self._session_factory() as session:
+            await session.execute(update(Job).where(Job.id == job_id).values(**values))
+            await session.commit()
+
+    async def _transition(self, job_id: int, expect: str, owned: bool = False, **values) -> bool:
+        """Update the job only if it is still in ``expect`` (and, when
+        ``owned``, still leased by this worker). Returns whether it was."""
+        stmt = update(Job).where(Job.id == job_id, Job.status == expect)
+        if owned:
+            stmt = stmt.where(Job.locked_by == self.worker_id)
+        async with self._session_factory() as session:
+            result = await session.execute(stmt.values(**values))
+            await session.commit()
+            return result.rowcount == 1
+
+    async def _finish(self, job_id: int, kind: str, status: str, expect: str = RUNNING,
+                      owned: bool = False, **values) -> bool:
+        done = await self._transition(
+            job_id, expect, owned=owned, status=status, finished_at=datetime.utcnow(), locked_by=None, **values
+        )
+        if done:
+            metrics.jobs_finished.labels(kind=kind, status=status).inc()
+        return done
+
+    async def _claim(self, job_id: int, attempt: int) -> bool:
+        # conditional update so only one worker process picks up a pending job
+        now = datetime.utcnow()
+        return await self._transition(
+            job_id, PENDING, status=RUNNING, attempts=attempt, started_at=now,
+            locked_by=self.worker_id, heartbeat_at=now, run_after=None,
+        )
+
+    def _enqueue(self, job_id: int) -> None:
+        if job_id in self._queued or job_id in self._running:
+            return
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _poll_pending(self) -> None:
+        if self._queue.qsize() >= self.concurrency:
+            return
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            stmt = (
+                select(Job.id)
+                .where(Job.status == PENDING, or_(Job.run_after.is_(None), Job.run_after <= now))
+                .order_by(Job.id)
+                .limit(self.concurrency * 2)
+            )
+            for job_id in (await session.execute(stmt)).scalars().all():
+                self._enqueue(job_id)
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._heartbeat()
+                await self._reclaim_expired()
+                await self._poll_pending()
+            except Exception:
+                logger.exception("job queue maintenance failed")
+
+    async def _heartbeat(self) -> None:
+        """Refresh our leases and stop jobs whose cancellation was requested."""
+        async with self._session_factory() as session:
+            await session.execute(
+                update(Job)
+                .where(Job.locked_by == self.worker_id, Job.status == RUNNING)
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            await session.commit()
+            stmt = select(Job.id).where(
+                Job.locked_by == self.worker_id, Job.status == RUNNING, Job.cancel_requested.is_(True)
+            )
+            cancelled = (await session.execute(stmt)).scalars().all()
+        for job_id in cancelled:
+            task = self._running.get(job_id)
+            if task is not None and job_id not in self._cancel_requested:
+                self._cancel_requested.add(job_id)
+                task.cancel()
+
+    async def _reclaim_expired(self) -> None:
+        """Release leases of workers that stopped heartbeating (killed or hung)."""
+        now = datetime.utcnow()
+        expired = (Job.status == RUNNING, Job.heartbeat_at < now - timedelta(seconds=self.lease_timeout))
+        async with self._session_factory() as session:
+            await session.execute(
+                update(Job).where(*expired, Job.cancel_requested.is_(True))
+                .values(status=CANCELLED, locked_by=None, finished_at=now)
+            )
+            await session.execute(
+                update(Job).where(*expired, Job.attempts >= Job.max_attempts)
+                .values(status=FAILED, locked_by=None, finished_at=now, error="Worker lost while running job")
+            )
+            result = await session.execute(
+                update(Job).where(*expired).values(status=PENDING, locked_by=None)
+            )
+            await session.commit()
+        if result.rowcount:
+            logger.warning("reclaimed %s job(s) with expired leases", result.rowcount)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("job %s crashed the worker loop", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        job = await self.get(job_id)
+        if job is None or job.status != PENDING:
+            return
+        if job.run_after is not None and job.run_after > datetime.utcnow():
+            return  # waiting out a retry delay; the poller brings it back
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            await self._finish(job_id, job.kind, FAILED, expect=PENDING,
+                               error=f"No handler for job kind {job.kind!r}")
+            return
+
+        attempt = (job.attempts or 0) + 1
+        if not await self._claim(job_id, attempt):
+            return
+        started = time.perf_counter()
+        task = asyncio.create_task(handler(JobContext(self, job_id, attempt), dict(job.payload or {})))
+        self._running[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancel_requested:
+                # queue shutdown: hand the job back for another worker to pick up
+                await self._transition(job_id, RUNNING, owned=True, status=PENDING, locked_by=None)
+                raise
+            await self._finish(job_id, job.kind, CANCELLED, owned=True)
+        except Exception as exc:
+            logger.warning("job %s (%s) attempt %s failed: %s", job_id, job.kind, attempt, exc)
+            if attempt < (job.max_attempts or 1):
+                await self._transition(
+                    job_id, RUNNING, owned=True, status=PENDING, locked_by=None, error=str(exc),
+                    run_after=datetime.utcnow() + timedelta(seconds=self.retry_delay * attempt),
+                )
+            else:
+                await self._finish(job_id, job.kind, FAILED, owned=True, error=str(exc))
+        else:
+            try:
+                done = await self._finish(job_id, job.kind, SUCCEEDED, owned=True,
+                                          result=result, progress=1.0, error=None)
+            except Exception as exc:
+                done = await self._finish(job_id, job.kind, FAILED, owned=True,
+                                          error=f"Could not store job result: {exc}")
+            if not done:
+                logger.warning("job %s finished after losing its lease; result discarded", job_id)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+            metrics.job_duration.labels(kind=job.kind).observe(time.perf_counter() - started)
+
+
+job_queue = JobQueue()
+
+
+def get_job_queue() -> JobQueue:
+    return job_queue
@@ -0,0 +1,67 @@
+"""
+Application-level Prometheus metrics.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (see ``gunicorn.conf.py``),
+prometheus_client keeps every counter and histogram value in per-process
+mmap'd files in that directory. ``/metrics`` then merges the files of all
+workers, so the numbers cover the whole node rather than whichever worker
+served the scrape. Without the env var the same metrics are plain
+in-process values.
+
+Metrics are best-effort: if prometheus_client is not installed, they are
+no-ops.
+"""
+import os
+
+try:
+    from prometheus_client import Counter, Histogram
+    from prometheus_client import multiprocess
+except Exception:
+    Counter = Histogram = multiprocess = None
+
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _counter(name: str, documentation: str, labelnames=()):
+    if Counter is None:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def _histogram(name: str, documentation: str, labelnames=(), buckets=None):
+    if Histogram is None:
+        return _NoopMetric()
+    if buckets is None:
+        return Histogram(name, documentation, labelnames)
+    return Histogram(name, documentation, labelnames, buckets=buckets)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop live-gauge files of an exited worker (called by the launcher)."""
+    if multiprocess is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+telemetry_frames = _counter("nexus_telemetry_frames_total", "Telemetry frames accepted")
+telemetry_points = _counter("nexus_telemetry_points_total", "Telemetry points accepted")
+telemetry_rejected = _counter("nexus_telemetry_rejected_total", "Telemetry requests rejected", ["reason"])
+telemetry_request_points = _histogram(
+    "nexus_telemetry_request_points",
+    "Points per telemetry ingest request",
+    buckets=(1, 10, 100, 1000, 10000, 100000, 1000000),
+)
+
+jobs_finished = _counter("nexus_jobs_finished_total", "Background jobs finished", ["kind", "status"])
+job_duration = _histogram("nexus_job_duration_seconds", "Background job attempt duration", ["kind"])
@@ -0,0 +1,60 @@
+"""
+Built-in background job handlers.
+
+Imported by ``app.main`` so the handlers are registered before the job queue
+starts. Add new long-running operations here rather than running them inline
+in a request handler. Bulky output goes to a file under
+``settings.job_artifact_dir``; the job result names it in ``artifact``
+(relative to that directory) and clients fetch it from
+``GET /api/v1/jobs/{job_id}/artifact``.
+"""
+import json
+import os
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+
+from .core.config import settings
+from .core.jobs import JobContext, job_handler
+from .models import Project
+
+
+def _append_lines(path: str, lines) -> None:
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.writelines(lines)
+
+
+@job_handler("export_projects")
+async def export_projects(ctx: JobContext, payload: Dict[str, Any]):
+    """Export every project as JSON Lines, in batches of ``batch_size``."""
+    batch_size = max(1, int(payload.get("batch_size", 500)))
+    os.makedirs(settings.job_artifact_dir, exist_ok=True)
+    artifact = f"export_projects-{ctx.job_id}.jsonl"
+    path = os.path.join(settings.job_artifact_dir, artifact)
+    # a retried attempt starts the file over
+    open(path, "w").close()
+
+    count = 0
+    async with ctx.session() as session:
+        total = (await session.execute(select(func.count(Project.id)))).scalar_one()
+        last_id = 0
+        while True:
+            stmt = select(Project).where(Project.id > last_id).order_by(Project.id).limit(batch_size)
+            batch = (await session.execute(stmt)).scalars().all()
+            if not batch:
+                break
+            lines = [
+                json.dumps({
+                    "id": project.id,
+                    "name": project.name,
+                    "description": project.description,
+                    "completion": project.completion,
+                    "owner_id": project.owner_id,
+                }) + "\n"
+                for project in batch
+            ]
+            await ctx.run_in_thread(_append_lines, path, lines)
+            count += len(batch)
+            last_id = batch[-1].id
+            await ctx.report(count / total if total else 1.0, f"exported {count}/{total}")
+    return {"count": count, "artifact": artifact}
@@ -1,9 +1,12 @@
+import logging
 import os
 from fastapi import FastAPI
 from pydantic import BaseModel
 from typing import List
 import random
 from .api.v1 import router as v1_router
+from .core.jobs import job_queue
+from . import job_handlers  # noqa: F401  (registers built-in job kinds)
 
 # Optional observability/security integrations
 try:
@@ -26,9 +29,26 @@ except Exception:
     Instrumentator = None
 
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Nexus Edge Systems API")
 app.include_router(v1_router)
 
+
+@app.on_event("startup")
+async def start_job_queue():
+    # best-effort: the API keeps serving with jobs disabled (e.g. no jobs table yet)
+    try:
+        await job_queue.start()
+    except Exception:
+        logger.exception("Background job queue could not start; jobs are disabled")
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+
+
 # Initialize Sentry if provided via env
 SENTRY_DSN = os.getenv("SENTRY_DSN")
 if sentry_sdk and SENTRY_DSN:
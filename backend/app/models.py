@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, ForeignKey, Text, Float, JSON
 from sqlalchemy.orm import relationship, declarative_base
 
 Base = declarative_base()
@@ -25,3 +25,34 @@ class Project(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     owner = relationship("User", backref="projects")
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TelemetryPoint(Base):
+    __tablename__ = "telemetry_points"
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(String(255), nullable=True, index=True)
+    time = Column(BigInteger, nullable=False, index=True)  # unix epoch milliseconds
+    value = Column(Float, nullable=False)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(100), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    payload = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    progress = Column(Float, default=0.0)
+    message = Column(String(255), nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=1)
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    locked_by = Column(String(64), nullable=True, index=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    run_after = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,69 @@
+"""
+Gunicorn config for running the API with several worker processes.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master (``preload_app``) and workers are
+forked from it, so imported modules are shared copy-on-write instead of
+being loaded again by every worker. Prometheus metrics are written to
+per-process mmap'd files under ``PROMETHEUS_MULTIPROC_DIR`` and merged on
+each ``/metrics`` scrape, so the endpoint reports the whole node. The
+directory defaults to one per bind address under the temp dir and is
+cleared of ``*.db`` metric files when the master starts.
+
+Tunables (env): WEB_CONCURRENCY, BIND, GUNICORN_TIMEOUT,
+PROMETHEUS_MULTIPROC_DIR.
+"""
+import asyncio
+import glob
+import multiprocessing
+import os
+import re
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = True
+
+# Must be set before the preloaded app imports prometheus_client. The default
+# is keyed on the bind address so instances on one host never share it.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "nexus-prometheus-" + re.sub(r"\W", "_", bind)),
+)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def _reset_multiproc_dir(path: str) -> None:
+    # files from a previous run would otherwise be merged into the new totals;
+    # only the metric files go, in case the directory is shared with anything else
+    os.makedirs(path, exist_ok=True)
+    for db_file in glob.glob(os.path.join(path, "*.db")):
+        os.remove(db_file)
+
+
+def on_starting(server):
+    # runs once per master start; config reloads on SIGHUP keep live worker files
+    _reset_multiproc_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    from app.core.database import engine
+    from app.core.jobs import job_queue
+
+    async def recover():
+        # reclaim jobs whose workers died with the previous master
+        try:
+            await job_queue.recover()
+        finally:
+            # never hand pooled connections opened in the master to forked workers
+            await engine.dispose()
+
+    asyncio.run(recover())
+
+
+def child_exit(server, worker):
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,326 @@
+"""
+Tests for the in-process background job queue.
+Uses a per-test SQLite file so concurrent workers get their own connections.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.config import settings
+from app.core.jobs import CANCELLED, FAILED, PENDING, RUNNING, SUCCEEDED, JobQueue, get_job_queue
+from app.job_handlers import export_projects
+from app.models import Base, Job, Project
+
+
+async def add_job(ctx, payload):
+    await ctx.report(0.5, "halfway")
+    return {"sum": await ctx.run_in_thread(sum, payload["values"])}
+
+
+async def flaky_job(ctx, payload):
+    if ctx.attempt < payload["succeed_on"]:
+        raise RuntimeError(f"attempt {ctx.attempt} failed")
+    return ctx.attempt
+
+
+async def sleep_job(ctx, payload):
+    await asyncio.sleep(60)
+
+
+# per-queue registry, so test handlers never reach the app's global one
+HANDLERS = {
+    "test_add": add_job,
+    "test_flaky": flaky_job,
+    "test_sleep": sleep_job,
+    "export_projects": export_projects,
+}
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def make_queue(session_factory, handlers=HANDLERS):
+    return JobQueue(
+        session_factory=session_factory,
+        concurrency=2,
+        retry_delay=0,
+        handlers=dict(handlers),
+        poll_interval=0.05,
+        lease_timeout=0.5,
+    )
+
+
+@pytest_asyncio.fixture
+async def queue(session_factory):
+    q = make_queue(session_factory)
+    await q.start()
+    yield q
+    await q.stop()
+
+
+@pytest_asyncio.fixture
+async def client(queue):
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+async def wait_for(queue, job_id, statuses, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        job = await queue.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job.status}")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_stores_result(queue):
+    job = await queue.submit("test_add", {"values": [1, 2, 3]})
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.status == SUCCEEDED
+    assert job.result == {"sum": 6}
+    assert job.progress == 1.0
+    assert job.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_job_retries_until_success(queue):
+    job = await queue.submit("test_flaky", {"succeed_on": 3}, max_attempts=3)
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.status == SUCCEEDED
+    assert job.result == 3
+
+
+@pytest.mark.asyncio
+async def test_job_fails_after_max_attempts(queue):
+    job = await queue.submit("test_flaky", {"succeed_on": 5}, max_attempts=2)
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.status == FAILED
+    assert job.attempts == 2
+    assert "attempt 2 failed" in job.error
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job(queue):
+    job = await queue.submit("test_sleep")
+    await wait_for(queue, job.id, {"running"})
+    job = await queue.cancel(job.id)
+    assert job.status == CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_run_in_process_requires_pool(queue):
+    async def process_job(ctx, payload):
+        return await ctx.run_in_process(sum, payload["values"])
+
+    queue.handlers["test_process"] = process_job
+    job = await queue.submit("test_process", {"values": [1, 2]})
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.status == FAILED
+    assert "JOB_PROCESS_WORKERS" in job.error
+    assert queue._process_pool is None
+
+    queue.process_workers = 1
+    job = await queue.submit("test_process", {"values": [1, 2]})
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.result == 3
+
+
+@pytest.mark.asyncio
+async def test_submit_unknown_kind(queue):
+    with pytest.raises(KeyError):
+        await queue.submit("no_such_job")
+
+
+@pytest.mark.asyncio
+async def test_pending_job_is_claimed_once(queue):
+    await queue.stop()
+    job = await queue.submit("test_add", {"values": [1]})
+    assert await queue._claim(job.id, 1) is True
+    assert await queue._claim(job.id, 1) is False
+
+
+@pytest.mark.asyncio
+async def test_cancel_from_another_queue(queue, session_factory):
+    other = make_queue(session_factory)
+    job = await queue.submit("test_sleep")
+    await wait_for(queue, job.id, {RUNNING})
+
+    job = await other.cancel(job.id)
+    assert job.status == RUNNING and job.cancel_requested
+    job = await wait_for(queue, job.id, {CANCELLED, SUCCEEDED, FAILED})
+    assert job.status == CANCELLED
+    await asyncio.sleep(0.2)
+    assert (await queue.get(job.id)).status == CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_stopped_queue_hands_job_to_another(queue, session_factory):
+    job = await queue.submit("test_sleep")
+    await wait_for(queue, job.id, {RUNNING})
+    await queue.stop()
+    assert (await queue.get(job.id)).status == PENDING
+
+    async def resumed(ctx, payload):
+        return "resumed"
+
+    other = make_queue(session_factory, handlers={"test_sleep": resumed})
+    await other.start(recover=False)
+    try:
+        job = await wait_for(other, job.id, {SUCCEEDED, FAILED})
+    finally:
+        await other.stop()
+    assert job.result == "resumed"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(queue, session_factory):
+    async with session_factory() as session:
+        job = Job(
+            kind="test_add", status=RUNNING, payload={"values": [4]}, attempts=0, max_attempts=1,
+            locked_by="dead-worker", heartbeat_at=datetime.utcnow() - timedelta(minutes=5),
+        )
+        session.add(job)
+        await session.commit()
+        job_id = job.id
+
+    job = await wait_for(queue, job_id, {SUCCEEDED, FAILED})
+    assert job.status == SUCCEEDED
+    assert job.result == {"sum": 4}
+
+
+@pytest.mark.asyncio
+async def test_recover_leaves_live_leases(queue, session_factory):
+    job = await queue.submit("test_sleep")
+    await wait_for(queue, job.id, {RUNNING})
+
+    other = make_queue(session_factory)
+    await other.recover()
+    job = await queue.get(job.id)
+    assert job.status == RUNNING and job.locked_by == queue.worker_id
+
+
+@pytest.mark.asyncio
+async def test_export_projects_writes_artifact(queue, session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_artifact_dir", str(tmp_path / "artifacts"))
+    async with session_factory() as session:
+        session.add_all([Project(name=f"p{i}", completion=i) for i in range(5)])
+        await session.commit()
+
+    job = await queue.submit("export_projects", {"batch_size": 2})
+    job = await wait_for(queue, job.id, {SUCCEEDED, FAILED})
+    assert job.status == SUCCEEDED
+    assert job.result["count"] == 5
+    assert job.result["artifact"] == f"export_projects-{job.id}.jsonl"
+    with open(tmp_path / "artifacts" / job.result["artifact"]) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [row["name"] for row in rows] == [f"p{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_api_submit_and_get(client, queue):
+    r = await client.post("/api/v1/jobs/", json={"kind": "test_add", "payload": {"values": [2, 3]}})
+    assert r.status_code == 202
+    job_id = r.json()["id"]
+    await wait_for(queue, job_id, {SUCCEEDED, FAILED})
+
+    r = await client.get(f"/api/v1/jobs/{job_id}")
+    assert r.status_code == 200
+    assert r.json()["status"] == SUCCEEDED
+    assert r.json()["result"] == {"sum": 5}
+
+
+@pytest.mark.asyncio
+async def test_api_unknown_kind(client):
+    r = await client.post("/api/v1/jobs/", json={"kind": "no_such_job"})
+    assert r.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_api_unknown_job(client):
+    assert (await client.get("/api/v1/jobs/9999")).status_code == 404
+    assert (await client.post("/api/v1/jobs/9999/cancel")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_api_cancel(client, queue):
+    job_id = (await client.post("/api/v1/jobs/", json={"kind": "test_sleep"})).json()["id"]
+    await wait_for(queue, job_id, {"running"})
+    r = await client.post(f"/api/v1/jobs/{job_id}/cancel")
+    assert r.status_code == 200
+    assert r.json()["status"] == CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_api_list_omits_result(client, queue):
+    job_id = (await client.post("/api/v1/jobs/", json={"kind": "test_add", "payload": {"values": [1]}})).json()["id"]
+    await wait_for(queue, job_id, {SUCCEEDED, FAILED})
+    r = await client.get("/api/v1/jobs/", params={"limit": 10})
+    assert r.status_code == 200
+    jobs = r.json()
+    assert [job["id"] for job in jobs] == [job_id]
+    assert "result" not in jobs[0] and "payload" not in jobs[0]
+
+
+@pytest.mark.asyncio
+async def test_api_download_artifact(client, queue, session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_artifact_dir", str(tmp_path / "artifacts"))
+    async with session_factory() as session:
+        session.add(Project(name="p0", completion=0))
+        await session.commit()
+
+    job_id = (await client.post("/api/v1/jobs/", json={"kind": "export_projects"})).json()["id"]
+    await wait_for(queue, job_id, {SUCCEEDED, FAILED})
+    r = await client.get(f"/api/v1/jobs/{job_id}/artifact")
+    assert r.status_code == 200
+    assert [json.loads(line)["name"] for line in r.text.splitlines()] == ["p0"]
+
+
+@pytest.mark.asyncio
+async def test_api_artifact_stays_inside_artifact_dir(client, session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_artifact_dir", str(tmp_path / "artifacts"))
+    (tmp_path / "artifacts").mkdir()
+    (tmp_path / "secret.txt").write_text("secret")
+    async with session_factory() as session:
+        job = Job(kind="export_projects", status=SUCCEEDED, result={"artifact": "../secret.txt"})
+        session.add(job)
+        await session.commit()
+        job_id = job.id
+
+    assert (await client.get(f"/api/v1/jobs/{job_id}/artifact")).status_code == 404
+    assert (await client.get("/api/v1/jobs/9999/artifact")).status_code == 404
+
+
+def test_app_serves_when_queue_cannot_start(tmp_path, monkeypatch):
+    import app.main as main_module
+    from fastapi.testclient import TestClient
+
+    # no tables at all, like a fresh database before create_tables.py
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'empty.db'}")
+    broken = make_queue(sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+    monkeypatch.setattr(main_module, "job_queue", broken)
+    app.dependency_overrides[get_job_queue] = lambda: broken
+    try:
+        with TestClient(app) as c:
+            assert c.get("/health").status_code == 200
+            assert c.post("/api/v1/jobs/", json={"kind": "test_add"}).status_code == 503
+    finally:
+        app.dependency_overrides.clear()
+    assert not broken.started
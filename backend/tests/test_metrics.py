@@ -1,6 +1,11 @@
+import os
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core import metrics
 
 
 @pytest.fixture
@@ -21,3 +26,43 @@ def test_metrics(client):
     assert isinstance(data, list)
     assert len(data) == 12
     assert "time" in data[0] and "value" in data[0]
+
+
+def test_multiprocess_counters_are_summed(tmp_path):
+    prometheus_client = pytest.importorskip("prometheus_client")
+    from prometheus_client import multiprocess
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    code = "from app.core import metrics; metrics.telemetry_points.inc(5)"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", code], cwd=backend_dir, env=env, check=True)
+
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value("nexus_telemetry_points_total") == 10
+
+
+def test_metrics_are_noops_without_prometheus_client(monkeypatch):
+    monkeypatch.setattr(metrics, "Counter", None)
+    monkeypatch.setattr(metrics, "Histogram", None)
+    counter = metrics._counter("nexus_test_total", "test", ["reason"])
+    histogram = metrics._histogram("nexus_test_seconds", "test", buckets=(1, 2))
+    assert isinstance(counter, metrics._NoopMetric)
+    assert isinstance(histogram, metrics._NoopMetric)
+    counter.labels(reason="x").inc()
+    histogram.observe(1.5)
+
+
+def test_mark_process_dead(tmp_path, monkeypatch):
+    pytest.importorskip("prometheus_client")
+    live = tmp_path / "gauge_livesum_123.db"
+    live.write_bytes(b"")
+
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", None)
+    metrics.mark_process_dead(123)
+    assert live.exists()
+
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", str(tmp_path))
+    metrics.mark_process_dead(123)
+    assert not live.exists()
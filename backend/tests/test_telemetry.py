@@ -0,0 +1,154 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.api.v1 import telemetry
+from app.api.v1.telemetry import FRAME_HEADER, FrameAccumulator, TelemetrySink, encode_frame, get_telemetry_sink
+from app.core.config import settings
+from app.core.database import get_db
+from app.models import Base, TelemetryPoint
+
+
+class ListSink(TelemetrySink):
+    def __init__(self):
+        self.staged = []
+        self.committed = []
+
+    async def write(self, device_id, times, values):
+        self.staged.extend((device_id, t, v) for t, v in zip(times.tolist(), values.tolist()))
+
+    async def commit(self):
+        self.committed.extend(self.staged)
+        self.staged = []
+
+    async def rollback(self):
+        self.staged = []
+
+
+@pytest.fixture
+def sink():
+    sink = ListSink()
+    app.dependency_overrides[get_telemetry_sink] = lambda: sink
+    yield sink
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client(sink):
+    return TestClient(app)
+
+
+def test_ingest_frames(client, sink):
+    body = encode_frame([1000, 2000, 3000], [1.0, 2.0, 6.0]) + encode_frame([4000], [-1.0])
+    r = client.post("/api/v1/telemetry/ingest", content=body, headers={"X-Device-Id": "dev-1"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["frames"] == 2
+    assert data["points"] == 4
+    assert data["min_time"] == 1000 and data["max_time"] == 4000
+    assert data["min_value"] == -1.0 and data["max_value"] == 6.0
+    assert data["mean_value"] == 2.0
+    assert sink.committed == [
+        ("dev-1", 1000, 1.0), ("dev-1", 2000, 2.0), ("dev-1", 3000, 6.0), ("dev-1", 4000, -1.0),
+    ]
+
+
+def test_ingest_gzip(client):
+    body = gzip.compress(encode_frame(range(500), [0.5] * 500))
+    r = client.post("/api/v1/telemetry/ingest", content=body, headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json()["points"] == 500
+
+
+def test_ingest_gzip_concatenated_members(client, sink):
+    body = gzip.compress(encode_frame([1, 2], [1.0, 2.0])) + gzip.compress(encode_frame([3, 4], [3.0, 4.0]))
+    r = client.post("/api/v1/telemetry/ingest", content=body, headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json()["points"] == 4
+    assert len(sink.committed) == 4
+
+
+def test_ingest_gzip_trailing_garbage(client, sink):
+    body = gzip.compress(encode_frame([1, 2], [1.0, 2.0])) + b"this is not gzip data"
+    r = client.post("/api/v1/telemetry/ingest", content=body, headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 400
+    assert sink.committed == []
+
+
+def test_ingest_rejects_non_finite(client, sink):
+    body = encode_frame([1], [1.0]) + encode_frame([1, 2], [1.0, float("nan")])
+    r = client.post("/api/v1/telemetry/ingest", content=body)
+    assert r.status_code == 422
+    assert sink.committed == []
+
+
+def test_ingest_rejects_truncated_frame(client):
+    body = encode_frame([1, 2], [1.0, 2.0])
+    r = client.post("/api/v1/telemetry/ingest", content=body[:-3])
+    assert r.status_code == 422
+
+
+def test_ingest_rejects_too_many_points(client, sink, monkeypatch):
+    monkeypatch.setattr(settings, "telemetry_max_request_points", 5)
+    body = encode_frame([1, 2, 3], [1.0, 2.0, 3.0]) * 2
+    r = client.post("/api/v1/telemetry/ingest", content=body)
+    assert r.status_code == 413
+    assert sink.committed == []
+
+
+def test_ingest_writes_per_inflate_step(client, sink, monkeypatch):
+    monkeypatch.setattr(telemetry, "INFLATE_CHUNK", 4096)
+    drained = []
+    original_drain = FrameAccumulator.drain
+
+    def drain(self):
+        frames = original_drain(self)
+        drained.append(len(frames))
+        return frames
+
+    monkeypatch.setattr(FrameAccumulator, "drain", drain)
+    frame = encode_frame([1], [1.0])
+    body = gzip.compress(frame * 2000)
+    r = client.post("/api/v1/telemetry/ingest", content=body, headers={"Content-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json()["points"] == 2000
+    # each write covers one bounded inflate step, not the whole network chunk
+    assert max(drained) <= 4096 // len(frame) + 1
+
+
+def test_ingest_stores_points(tmp_path):
+    db_path = tmp_path / "telemetry.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{db_path}"))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    TestSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with TestSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        r = TestClient(app).post("/api/v1/telemetry/ingest", content=encode_frame([10, 20], [1.5, 2.5]))
+        assert r.status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+    with create_engine(f"sqlite:///{db_path}").connect() as conn:
+        rows = conn.execute(select(TelemetryPoint.time, TelemetryPoint.value).order_by(TelemetryPoint.time)).all()
+    assert [tuple(row) for row in rows] == [(10, 1.5), (20, 2.5)]
+
+
+def test_accumulator_handles_split_frames():
+    frame = encode_frame([10, 20], [3.0, 4.0])
+    acc = FrameAccumulator()
+    buf = bytearray(frame[: FRAME_HEADER.size + 5])
+    assert acc.consume(buf) == 0
+    buf += frame[FRAME_HEADER.size + 5:]
+    assert acc.consume(buf) == len(frame)
+    assert acc.summary().points == 2
+    assert len(acc.drain()) == 1